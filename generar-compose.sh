@@ -4,7 +4,7 @@ FILE=$1
 CLIENTS=$2
 
 echo "Generating compose file for $CLIENTS clients modifying $FILE"
-python3 generator.py $FILE $CLIENTS
+python3 generator.py $FILE $CLIENTS "${@:3}"
 
 if [ $? -eq 0 ]; then
     echo "Compose file generated successfully"
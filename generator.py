@@ -1,4 +1,10 @@
+from argparse import ArgumentParser, ArgumentTypeError, Namespace
+import io
+import os
+import random
 from sys import argv
+from typing import Iterator, Optional
+import zipfile
 
 SERVER_SERVICE = """
   server:
@@ -34,9 +40,33 @@ CLIENT_SERVICE = """
       - server
     volumes:
       - ./client/config.yaml:/config.yaml
-      - ./.data:/data:ro
+      - data-dir:/data:ro
 """
 
+RESOURCE_LIMITS = """    deploy:
+      resources:
+        limits:
+"""
+
+DEFAULT_DATA_DIR = "./.data"
+
+""" Rows buffered in memory by split before appending them to the agency files """
+SPLIT_BUFFER_ROWS = 65536
+
+""" Winner number of the server, must match LOTTERY_WINNER_NUMBER in server/common/utils.py """
+LOTTERY_WINNER_NUMBER = 7574
+
+FIRST_NAMES = [
+    "Santiago Lionel", "Agustin Emanuel", "Tiago Nicolás", "Valentina", "Maximiliano",
+    "Lautaro Valentin", "Emanuel", "Nicolas Andres", "Martina", "Sofia Belen",
+    "Juan Cruz", "Camila", "Lucia", "Mateo", "Florencia",
+]
+
+LAST_NAMES = [
+    "Lorca", "Zambrano", "Rivera", "Vera", "Soto", "Fornerón", "Huarte",
+    "Gomez", "Fernandez", "Rodriguez", "Lopez", "Martinez", "Perez", "Diaz",
+]
+
 NETWORKS = """
 networks:
   testing_net:
@@ -52,31 +82,210 @@ def save(file: str, data: str) -> None:
         f.write(data)
 
 
-def run(file: str, n_clients: int) -> None:
+def resource_limits(cpus: Optional[str], memory: Optional[str]) -> str:
+    """
+    Build the deploy resource limits block of a service, empty if no
+    limit is given
+    """
+    if not cpus and not memory:
+        return ""
+
+    data: str = RESOURCE_LIMITS
+
+    if cpus:
+        data += f"          cpus: \"{cpus}\"\n"
+    if memory:
+        data += f"          memory: {memory}\n"
+
+    return data
+
+
+def run(file: str, n_clients: int, data_dir: str = DEFAULT_DATA_DIR,
+        server_cpus: Optional[str] = None, server_memory: Optional[str] = None,
+        client_cpus: Optional[str] = None, client_memory: Optional[str] = None) -> None:
     data: str = "name: tp0\nservices:\n"
-    
+
     data += SERVER_SERVICE.replace("clients_amount", str(n_clients))
+    data += resource_limits(server_cpus, server_memory)
 
     for i in range(n_clients):
         data += CLIENT_SERVICE \
             .replace("client-service-name", f"client{i+1}") \
             .replace("client-container-name", f"client{i+1}") \
-            .replace("CLI_ID=id", f"CLI_ID={i+1}")
+            .replace("CLI_ID=id", f"CLI_ID={i+1}") \
+            .replace("data-dir", data_dir)
+        data += resource_limits(client_cpus, client_memory)
 
     data += NETWORKS
 
     save(file, data)
 
 
+def synthesize_bets(agency: int, n_bets: int, winner_ratio: float, seed: int) -> Iterator[str]:
+    """
+    Lazily generate n_bets csv rows for an agency with the format
+    <first-name>,<last-name>,<document>,<birthdate>,<number>
+
+    Each row is a winner with probability winner_ratio. The same
+    (agency, seed) pair always generates the same rows
+    """
+    rng: random.Random = random.Random(f"{seed}-{agency}")
+
+    for _ in range(n_bets):
+        if rng.random() < winner_ratio:
+            number: int = LOTTERY_WINNER_NUMBER
+        else:
+            # Skip the winner number keeping the rest uniformly distributed
+            number = rng.randrange(9999)
+            number += number >= LOTTERY_WINNER_NUMBER
+
+        yield (
+            f"{rng.choice(FIRST_NAMES)},{rng.choice(LAST_NAMES)},"
+            f"{rng.randrange(10000000, 100000000)},"
+            f"{rng.randrange(1940, 2006)}-{rng.randrange(1, 13):02d}-{rng.randrange(1, 29):02d},"
+            f"{number}\n"
+        )
+
+
+def synthesize(out_dir: str, n_clients: int, n_bets: int, winner_ratio: float, seed: int) -> None:
+    """
+    Write one agency-<id>.csv file with n_bets synthetic bets per client,
+    streaming rows to disk instead of holding them in memory
+    """
+    os.makedirs(out_dir, exist_ok=True)
+
+    for agency in range(1, n_clients + 1):
+        path: str = os.path.join(out_dir, f"agency-{agency}.csv")
+        with open(path, "w", encoding="utf-8") as f:
+            f.writelines(synthesize_bets(agency, n_bets, winner_ratio, seed))
+
+
+def split(dataset: str, out_dir: str, n_clients: int) -> None:
+    """
+    Distribute every row of the dataset zip round-robin across n_clients
+    agency-<id>.csv files, streaming rows from the archive to disk
+
+    Rows are buffered up to SPLIT_BUFFER_ROWS in total and then appended
+    one file at a time, so a single output file is open at any moment
+    regardless of the amount of clients
+    """
+    os.makedirs(out_dir, exist_ok=True)
+
+    paths: list[str] = [
+        os.path.join(out_dir, f"agency-{i+1}.csv") for i in range(n_clients)
+    ]
+    for path in paths:
+        open(path, "w", encoding="utf-8").close()
+
+    buffers: list[list[str]] = [[] for _ in range(n_clients)]
+    buffered: int = 0
+    row: int = 0
+
+    with zipfile.ZipFile(dataset) as archive:
+        for name in sorted(archive.namelist()):
+            with archive.open(name) as raw:
+                for line in io.TextIOWrapper(raw, encoding="utf-8"):
+                    line = line.rstrip("\r\n")
+                    if not line:
+                        continue
+
+                    buffers[row % n_clients].append(line + "\n")
+                    row += 1
+                    buffered += 1
+
+                    if buffered >= SPLIT_BUFFER_ROWS:
+                        flush_buffers(paths, buffers)
+                        buffered = 0
+
+    flush_buffers(paths, buffers)
+
+
+def flush_buffers(paths: list[str], buffers: list[list[str]]) -> None:
+    """
+    Append each buffer to its file and clear it
+    """
+    for path, buffer in zip(paths, buffers):
+        if not buffer:
+            continue
+
+        with open(path, "a", encoding="utf-8") as f:
+            f.writelines(buffer)
+        buffer.clear()
+
+
+def positive_int(value: str) -> int:
+    number: int = int(value)
+    if number < 1:
+        raise ArgumentTypeError(f"expected a positive integer, got {value}")
+    return number
+
+
+def non_negative_int(value: str) -> int:
+    number: int = int(value)
+    if number < 0:
+        raise ArgumentTypeError(f"expected a non negative integer, got {value}")
+    return number
+
+
+def ratio(value: str) -> float:
+    number: float = float(value)
+    if not 0 <= number <= 1:
+        raise ArgumentTypeError(f"expected a ratio between 0 and 1, got {value}")
+    return number
+
+
+def parse_compose_args(args: list[str]) -> Namespace:
+    parser = ArgumentParser(prog="generator.py")
+    parser.add_argument("file")
+    parser.add_argument("n_clients", type=int)
+    parser.add_argument("--data-dir", default=DEFAULT_DATA_DIR,
+                        help="host directory with the agency-<id>.csv files")
+    parser.add_argument("--server-cpus")
+    parser.add_argument("--server-memory")
+    parser.add_argument("--client-cpus")
+    parser.add_argument("--client-memory")
+    return parser.parse_args(args)
+
+
+def parse_synthesize_args(args: list[str]) -> Namespace:
+    parser = ArgumentParser(prog="generator.py synthesize")
+    parser.add_argument("out_dir")
+    parser.add_argument("n_clients", type=positive_int)
+    parser.add_argument("--bets", type=non_negative_int, default=16000,
+                        help="bets per agency")
+    parser.add_argument("--winner-ratio", type=ratio, default=0.0001)
+    parser.add_argument("--seed", type=int, default=0)
+    return parser.parse_args(args)
+
+
+def parse_split_args(args: list[str]) -> Namespace:
+    parser = ArgumentParser(prog="generator.py split")
+    parser.add_argument("dataset")
+    parser.add_argument("out_dir")
+    parser.add_argument("n_clients", type=positive_int)
+    return parser.parse_args(args)
+
+
 def main() -> None:
     if len(argv) < 3:
-        print("Expected: python3 generator.py <file> <n_clients>")
+        print("Expected: python3 generator.py <file> <n_clients> [--data-dir <dir>] "
+              "[--server-cpus <cpus>] [--server-memory <memory>] "
+              "[--client-cpus <cpus>] [--client-memory <memory>]")
+        print("          python3 generator.py synthesize <out_dir> <n_clients> "
+              "[--bets <n>] [--winner-ratio <ratio>] [--seed <seed>]")
+        print("          python3 generator.py split <dataset.zip> <out_dir> <n_clients>")
         exit(1)
 
-    file: str = argv[1]
-    n_clients: int = int(argv[2])
-
-    run(file, n_clients)
+    if argv[1] == "synthesize":
+        args: Namespace = parse_synthesize_args(argv[2:])
+        synthesize(args.out_dir, args.n_clients, args.bets, args.winner_ratio, args.seed)
+    elif argv[1] == "split":
+        args = parse_split_args(argv[2:])
+        split(args.dataset, args.out_dir, args.n_clients)
+    else:
+        args = parse_compose_args(argv[1:])
+        run(args.file, args.n_clients, args.data_dir,
+            args.server_cpus, args.server_memory, args.client_cpus, args.client_memory)
 
 
 if __name__ == "__main__":
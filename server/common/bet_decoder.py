@@ -0,0 +1,75 @@
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import logging
+import multiprocessing
+from threading import Lock
+from typing import Optional
+from comms.packet import deserialize_bets_csv
+
+
+class BetDecoder:
+    """
+    Class that decodes raw bet payloads into CSV text ready to be stored
+
+    With workers > 0 payloads are decoded by a pool of worker processes,
+    so connection threads only wait for the result without holding the GIL.
+    With workers = 0 payloads are decoded in the calling thread
+    """
+    __workers: int
+    __pool: Optional[ProcessPoolExecutor]
+    __pool_lock: Lock
+
+    def __init__(self, workers: int):
+        self.__workers = workers
+        self.__pool_lock = Lock()
+        self.__pool = self.__new_pool() if workers > 0 else None
+
+    def decode(self, data: bytes) -> tuple[int, str]:
+        """
+        Decode a raw bet payload blocking until it is done and return
+        the amount of bets and their CSV text
+        A BetDeserializationError is raised if any bet is invalid
+
+        If a worker process dies the pool is rebuilt for the next payloads
+        and the current one is decoded in the calling thread, so a server
+        fault is never reported to the client as invalid bets
+        """
+        pool: Optional[ProcessPoolExecutor] = self.__pool
+        if pool is None:
+            return deserialize_bets_csv(data)
+
+        try:
+            return pool.submit(deserialize_bets_csv, data).result()
+        except BrokenProcessPool as e:
+            logging.error(
+                f"action: decode_bets | result: fail | error: {str(e)}")
+            self.__restart_pool(pool)
+            return deserialize_bets_csv(data)
+
+    def shutdown(self) -> None:
+        """
+        Shutdown the worker processes waiting for pending payloads
+        """
+        with self.__pool_lock:
+            if self.__pool is not None:
+                self.__pool.shutdown(wait=True)
+
+    def __new_pool(self) -> ProcessPoolExecutor:
+        # Workers are spawned instead of forked since the server already
+        # runs other threads when the first payload is submitted
+        return ProcessPoolExecutor(
+            max_workers=self.__workers, mp_context=multiprocessing.get_context("spawn")
+        )
+
+    def __restart_pool(self, broken_pool: ProcessPoolExecutor) -> None:
+        """
+        Replace a broken pool, only once when several threads find it broken
+        """
+        with self.__pool_lock:
+            if self.__pool is not broken_pool:
+                return
+
+            broken_pool.shutdown(wait=False)
+            self.__pool = self.__new_pool()
+
+            logging.info("action: decode_bets_restart | result: success")
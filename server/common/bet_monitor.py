@@ -1,8 +1,10 @@
 from enum import Enum
 import logging
-from queue import Queue
-from typing import Any
-from common.utils import Bet, has_won, store_bets as store_bets_in_file, load_bets
+from queue import Empty, Queue
+import time
+from typing import Any, Optional
+from common.draw_rules import DrawRules
+from common.utils import Bet, store_csv, load_bets
 from threading import Lock, Thread
 
 
@@ -11,8 +13,9 @@ class Action(Enum):
     Enum class that represents the possible actions that the BetMonitor can
     receive
     """
-    STORE_BETS = "store_bets"
+    STORE_CSV = "store_csv"
     REGISTER_READY_AGENCY = "register_ready_agency"
+    RECONFIGURE = "reconfigure"
     SHUTDOWN = "shutdown"
 
 
@@ -20,18 +23,27 @@ class BetMonitor:
     """
     Class that represents the BetMonitor component of the server
     it consumes actions from a queue and stores the winners of the bets
+
+    Received bets are buffered and written to disk at most every
+    flush_interval seconds, 0 meaning every batch is written right away
     """
-    __queue: Queue[tuple[Action, Any]] = Queue()
+    __queue: Queue[tuple[Action, Any]]
     __winners_lock: Lock = Lock()
     __bet_winners_by_agency: dict[int, list[Bet]] = dict()
     __worker: Thread
     __running: bool
     __clients_amount: int
+    __flush_interval: float
+    __draw_rules: DrawRules
 
-    def __init__(self, clients_amount: int):
+    def __init__(self, clients_amount: int, draw_rules: DrawRules,
+                 queue_max_size: int = 0, flush_interval: float = 0):
+        self.__queue = Queue(maxsize=queue_max_size)
+        self.__clients_amount = clients_amount
+        self.__draw_rules = draw_rules
+        self.__flush_interval = flush_interval
         self.__worker = Thread(target=self.__run)
         self.__worker.start()
-        self.__clients_amount = clients_amount
 
     def push_action(self, action: tuple[Action, Any]) -> None:
         """
@@ -46,6 +58,22 @@ class BetMonitor:
         with self.__winners_lock:
             return self.__bet_winners_by_agency.pop(agency_id)
 
+    def reconfigure(self, queue_max_size: int, flush_interval: float) -> None:
+        """
+        Update the queue bound and the flush interval without losing
+        queued actions nor buffered bets
+
+        Shrinking the queue below its current size does not drop actions,
+        producers just block until the worker drains it. The flush interval
+        is applied by the worker itself, so buffered bets are flushed against
+        the new interval instead of the one it was waiting on
+        """
+        with self.__queue.mutex:
+            self.__queue.maxsize = queue_max_size
+            self.__queue.not_full.notify_all()
+
+        self.push_action((Action.RECONFIGURE, flush_interval))
+
     def shutdown(self) -> None:
         """
         Shutdown the BetMonitor and wait for the worker to join
@@ -59,36 +87,78 @@ class BetMonitor:
         Main loop of the BetMonitor that waits blocking for actions in the queue
         """
         agencies_ready_to_draw: set = set()
+        pending_csv: list[str] = []
+        last_flush: float = time.monotonic()
         self.__running = True
 
         while self.__running:
-            action, data = self.__queue.get(block=True)
+            timeout: Optional[float] = self.__time_to_flush(
+                last_flush) if pending_csv else None
 
-            if action == Action.STORE_BETS:
-                store_bets_in_file(data)
+            try:
+                action, data = self.__queue.get(block=True, timeout=timeout)
+            except Empty:
+                last_flush = self.__flush(pending_csv)
+                continue
+
+            if action == Action.STORE_CSV:
+                pending_csv.append(data)
+                if self.__time_to_flush(last_flush) == 0:
+                    last_flush = self.__flush(pending_csv)
 
             elif action == Action.REGISTER_READY_AGENCY:
                 agencies_ready_to_draw.add(data)
                 if len(agencies_ready_to_draw) == self.__clients_amount:
+                    last_flush = self.__flush(pending_csv)
                     self.__draw_bets(agencies_ready_to_draw)
 
+            elif action == Action.RECONFIGURE:
+                self.__flush_interval = data
+                if self.__time_to_flush(last_flush) == 0:
+                    last_flush = self.__flush(pending_csv)
+
             elif action == Action.SHUTDOWN:
+                self.__flush(pending_csv)
                 self.__running = False
 
             self.__queue.task_done()
 
+    def __time_to_flush(self, last_flush: float) -> float:
+        """
+        Seconds left until the buffered bets must be written to disk
+        """
+        return max(0.0, self.__flush_interval - (time.monotonic() - last_flush))
+
+    def __flush(self, pending_csv: list[str]) -> float:
+        """
+        Write the buffered bets to disk, clear the buffer and return
+        the flush time
+        """
+        if pending_csv:
+            store_csv("".join(pending_csv))
+            pending_csv.clear()
+
+        return time.monotonic()
+
     def __draw_bets(self, agencies_ready_to_draw: set[int]) -> None:
         """
-        Draw the bets and store the winners
+        Draw the bets and store the winners of every tier by agency
         """
-        bets: list[Bet] = load_bets()
-        winners: list[Bet] = [bet for bet in bets if has_won(bet)]
+        winners_by_tier: dict[str, list[Bet]] = self.__draw_rules.draw(load_bets())
+
+        for tier, winners in winners_by_tier.items():
+            logging.info(
+                f"action: sorteo | result: success | tier: {tier} | cantidad: {len(winners)}"
+            )
 
         with self.__winners_lock:
             for agency_id in agencies_ready_to_draw:
-                self.__bet_winners_by_agency[agency_id] = [
-                    bet for bet in winners if bet.agency == agency_id
-                ]
+                self.__bet_winners_by_agency[agency_id] = []
+
+            for winners in winners_by_tier.values():
+                for bet in winners:
+                    if bet.agency in agencies_ready_to_draw:
+                        self.__bet_winners_by_agency[bet.agency].append(bet)
 
             logging.info("action: sorteo | result: success")
 
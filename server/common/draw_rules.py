@@ -0,0 +1,164 @@
+from configparser import ConfigParser
+from typing import Iterable
+from common.utils import Bet, LOTTERY_WINNER_NUMBER
+
+
+""" Prefix of the config sections that define a prize tier, e.g. [DRAW first] """
+DRAW_SECTION_PREFIX = "DRAW "
+""" Tier used when no draw rules are configured """
+DEFAULT_TIER = "winner"
+""" Bets are 4 digit numbers """
+MAX_NUMBER = 9999
+
+
+def parse_numbers(raw: str) -> set[int]:
+    """
+    Parse a comma separated list of numbers and inclusive ranges
+    e.g. '7574, 1000-1099'
+    A ValueError is thrown if a number is invalid or out of range
+    """
+    numbers: set[int] = set()
+
+    for item in raw.split(","):
+        item = item.strip()
+        if not item:
+            continue
+
+        start, _, end = item.partition("-")
+        first: int = int(start)
+        last: int = int(end) if end else first
+
+        if not 0 <= first <= last <= MAX_NUMBER:
+            raise ValueError(f"invalid draw number or range: {item}")
+
+        numbers.update(range(first, last + 1))
+
+    return numbers
+
+
+class DrawRules:
+    """
+    Draw rules compiled into lookup structures indexed by bet number
+
+    Every bet is first checked against the set of all awarded numbers, so
+    non winning bets cost a single set lookup. Candidates are then classified
+    with a table that holds, for every number, the 1-based index of the first
+    tier that awards it or 0 if it has no prize. Agencies with overrides get
+    their own table, every other agency shares the default one
+    """
+    tiers: tuple[str, ...]
+    __candidates: frozenset[int]
+    __default_table: bytes
+    __agency_tables: dict[int, bytes]
+
+    def __init__(self, tiers: list[tuple[str, set[int], dict[int, set[int]]]]):
+        """
+        tiers must be passed in prize order as (name, numbers, overrides)
+        tuples, overrides replacing the tier numbers of specific agencies.
+        Tier names must be unique and not empty, since winners are
+        reported by name
+        """
+        if not 0 < len(tiers) < 256:
+            raise ValueError("between 1 and 255 draw tiers must be defined")
+
+        self.tiers = tuple(name for name, _, _ in tiers)
+
+        if not all(self.tiers):
+            raise ValueError("draw tier names must not be empty")
+        if len(set(self.tiers)) != len(self.tiers):
+            raise ValueError(f"draw tier names must be unique: {', '.join(self.tiers)}")
+
+        candidates: set[int] = set()
+        agencies: set[int] = set()
+        for _, numbers, overrides in tiers:
+            candidates.update(numbers)
+            agencies.update(overrides)
+            for agency_numbers in overrides.values():
+                candidates.update(agency_numbers)
+
+        self.__candidates = frozenset(candidates)
+        self.__default_table = self.__compile(
+            [numbers for _, numbers, _ in tiers]
+        )
+        self.__agency_tables = {
+            agency: self.__compile([
+                overrides.get(agency, numbers) for _, numbers, overrides in tiers
+            ])
+            for agency in agencies
+        }
+
+    @staticmethod
+    def __compile(tiers_numbers: list[set[int]]) -> bytes:
+        """
+        Build a lookup table, earlier tiers take precedence over later ones
+        """
+        table: bytearray = bytearray(MAX_NUMBER + 1)
+
+        for code in range(len(tiers_numbers), 0, -1):
+            for number in tiers_numbers[code - 1]:
+                table[number] = code
+
+        return bytes(table)
+
+    def draw(self, bets: Iterable[Bet]) -> dict[str, list[Bet]]:
+        """
+        Evaluate the bets and return the winners of each tier
+        Bets are consumed lazily, only the candidates are kept in memory
+        """
+        winners: dict[str, list[Bet]] = {tier: [] for tier in self.tiers}
+        tier_winners: list[list[Bet]] = [winners[tier] for tier in self.tiers]
+
+        candidates: frozenset[int] = self.__candidates
+        matches: list[Bet] = [bet for bet in bets if bet.number in candidates]
+
+        # With a single tier and no overrides every candidate is a winner
+        if len(tier_winners) == 1 and not self.__agency_tables:
+            tier_winners[0].extend(matches)
+            return winners
+
+        default_table: bytes = self.__default_table
+        agency_tables: dict[int, bytes] = self.__agency_tables
+
+        for bet in matches:
+            code: int = agency_tables.get(bet.agency, default_table)[bet.number]
+            if code:
+                tier_winners[code - 1].append(bet)
+
+        return winners
+
+
+def parse_draw_rules(config: ConfigParser) -> DrawRules:
+    """
+    Compile the draw rules defined in the [DRAW <tier>] config sections
+
+    Each section defines a prize tier, in prize order, with:
+    NUMBERS = comma separated numbers and ranges e.g. 7574, 1000-1099
+    AGENCY_<id> = numbers and ranges that replace NUMBERS for that agency
+
+    If no tier is defined a single tier with LOTTERY_WINNER_NUMBER is used.
+    A KeyError is thrown if NUMBERS is missing and a ValueError if a
+    value could not be parsed
+    """
+    tiers: list[tuple[str, set[int], dict[int, set[int]]]] = []
+    defaults = config.defaults()
+
+    for section in config.sections():
+        if not section.startswith(DRAW_SECTION_PREFIX):
+            continue
+
+        name: str = section[len(DRAW_SECTION_PREFIX):].strip()
+        values = config[section]
+
+        numbers: set[int] = parse_numbers(values["NUMBERS"])
+        overrides: dict[int, set[int]] = {
+            int(key[len("agency_"):]): parse_numbers(values[key])
+            for key in values
+            if key.startswith("agency_") and key not in defaults
+        }
+
+        tiers.append((name, numbers, overrides))
+
+    if not tiers:
+        tiers.append((DEFAULT_TIER, {LOTTERY_WINNER_NUMBER}, {}))
+
+    return DrawRules(tiers)
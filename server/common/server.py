@@ -3,23 +3,36 @@ import logging
 from threading import Thread
 from comms.socket import Socket
 from common.utils import Bet, has_won, load_bets, store_bets
-from comms.packet import BetDeserializationError, PacketHeader, deserialize_bets, deserialize_header
+from comms.packet import BetDeserializationError, PacketHeader, split_header
+from common.bet_decoder import BetDecoder
 from common.bet_monitor import Action, BetMonitor
+from common.draw_rules import DrawRules
+from common.tuning import Tuning, load_tuning
 
 
 class Server:
-    def __init__(self, port: int, listen_backlog: int, clients_amount: int):
+    def __init__(self, port: int, listen_backlog: int, clients_amount: int, tuning: Tuning,
+                 draw_rules: DrawRules, decode_workers: int = 0):
+        self.__tuning: Tuning = tuning
+        self.__clients_amount: int = clients_amount
+
         # Initialize server socket
         self._server_socket = Socket(
-            address=('', port), listen_backlog=listen_backlog
+            address=('', port), listen_backlog=listen_backlog,
+            recv_buffer_size=tuning.recv_buffer_size
         )
 
         self.__clients: list[tuple[Socket, Thread]] = []
 
-        self.__bet_monitor: BetMonitor = BetMonitor(clients_amount)
+        self.__bet_decoder: BetDecoder = BetDecoder(decode_workers)
+
+        self.__bet_monitor: BetMonitor = BetMonitor(
+            clients_amount, draw_rules, tuning.queue_max_size, tuning.flush_interval
+        )
         self._running = False
 
         signal.signal(signal.SIGTERM, self.__shutdown)
+        signal.signal(signal.SIGHUP, self.__reload_tuning)
 
     def run(self) -> None:
         """
@@ -30,13 +43,15 @@ class Server:
 
         while self._running:
             try:
+                self.__wait_for_free_slot()
+                if not self._running:
+                    break
+
                 client_sock: Socket = self.__accept_new_connection()
                 client_thread: Thread = Thread(
                     target=self.__handle_client_connection, args=(client_sock,)
                 )
 
-                self.__reap_clients()
-
                 self.__clients.append((client_sock, client_thread))
                 client_thread.start()
 
@@ -62,14 +77,14 @@ class Server:
                     f'action: receive_message | result: success | ip: {addr[0]} | msg: {msg}'
                 )
 
-                header, body = deserialize_header(msg)
+                header, body = split_header(msg)
 
                 if header == PacketHeader.BET.value:
                     self.__handle_bet(client_sock, body)
                 elif header == PacketHeader.BETDRAW.value:
-                    self.__handle_draw(client_sock, body)
+                    self.__handle_draw(client_sock, body.decode("utf-8"))
                 elif header == PacketHeader.DRAWRESULTS.value:
-                    self.__handle_bet_results(client_sock, body)
+                    self.__handle_bet_results(client_sock, body.decode("utf-8"))
                 elif header == PacketHeader.SHUTDOWN_CONNECTION.value:
                     self.__handle_shutdown(client_sock, addr[0])
                     running = False
@@ -92,20 +107,20 @@ class Server:
         client_sock.send_all(f"{PacketHeader.SHUTDOWN_CONNECTION.value} success\n".encode("utf-8"))
         logging.info(f"action: cerrar_conexion | result: success | ip: {ip}")
 
-    def __handle_bet(self, client_sock: Socket, msg: str) -> None:
+    def __handle_bet(self, client_sock: Socket, msg: bytes) -> None:
         """
         Store the bets received from the client
         If the bets are not correctly deserialized, a fail message is sent
         """
         try:
-            bet_batch: list[Bet] = deserialize_bets(msg)
+            bets_len, bets_csv = self.__bet_decoder.decode(msg)
 
             self.__bet_monitor.push_action(
-                (Action.STORE_BETS, bet_batch)
+                (Action.STORE_CSV, bets_csv)
             )
 
             logging.info(
-                f"action: apuesta_recibida | result: success | cantidad: {len(bet_batch)}"
+                f"action: apuesta_recibida | result: success | cantidad: {bets_len}"
             )
 
             success_msg: bytes = f"{PacketHeader.BET.value} success\n".encode("utf-8")
@@ -181,6 +196,31 @@ class Server:
         logging.info('action: accept_connections | result: in_progress')
         return self._server_socket.accept()
 
+    def __wait_for_free_slot(self) -> None:
+        """
+        Wait for a free connection slot
+
+        Function that blocks while max_connections clients are connected,
+        so new connections wait in the listen backlog instead of being
+        rejected. Finished clients are reaped while waiting
+        """
+        waiting: bool = False
+
+        while self._running:
+            self.__reap_clients()
+
+            max_connections: int = self.__tuning.max_connections
+            if not max_connections or len(self.__clients) < max_connections:
+                return
+
+            if not waiting:
+                logging.info(
+                    f"action: accept_connections | result: in_progress | "
+                    f"waiting: max connections reached ({max_connections})")
+                waiting = True
+
+            self.__clients[0][1].join(timeout=0.5)
+
     def __reap_clients(self) -> None:
         """
         Reap clients
@@ -214,16 +254,59 @@ class Server:
             client_sock.close()
             client_thread.join()
 
+    def __reload_tuning(self, signum, frame):
+        """
+        Reload tuning parameters
+
+        Function that re-reads the tuning parameters from the config file and
+        applies them to the running server without dropping connections.
+        The new parameters are fully parsed before anything is applied, so if
+        the config file is invalid the current parameters are kept
+        """
+        try:
+            new_tuning: Tuning = load_tuning()
+            new_tuning.check_clients_amount(self.__clients_amount)
+        except (OSError, KeyError, ValueError) as e:
+            logging.error(
+                f"action: reload_config | result: fail | error: {str(e)}")
+            return
+
+        old_tuning: Tuning = self.__tuning
+        self.__tuning = new_tuning
+
+        self._server_socket.recv_buffer_size = new_tuning.recv_buffer_size
+        for client_sock, _ in list(self.__clients):
+            client_sock.recv_buffer_size = new_tuning.recv_buffer_size
+
+        self.__bet_monitor.reconfigure(
+            new_tuning.queue_max_size, new_tuning.flush_interval
+        )
+
+        changes: str = " | ".join(
+            f"{name}: {old} -> {new}"
+            for name, (old, new) in old_tuning.changes(new_tuning).items()
+        )
+
+        # Log the reload with the most verbose of both levels so that it is
+        # visible either when raising or lowering the logging level
+        root_logger: logging.Logger = logging.getLogger()
+        root_logger.setLevel(min(
+            root_logger.level, logging.getLevelName(new_tuning.logging_level)
+        ))
+        logging.info(f"action: reload_config | result: success | {changes}")
+        root_logger.setLevel(new_tuning.logging_level)
+
     def __shutdown(self, signum, frame):
         """
         Shutdown server
 
-        Function that closes the server socket, stops the server loop
-        and waits for the bet monitor to join
+        Function that closes the server socket, stops the server loop,
+        stops the decode workers and waits for the bet monitor to join
         """
         self._running = False
         self._server_socket.close()
         self.__shutdown_clients()
+        self.__bet_decoder.shutdown()
         self.__bet_monitor.shutdown()
 
         signal_name: str = signal.Signals(signum).name
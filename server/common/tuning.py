@@ -0,0 +1,97 @@
+from configparser import ConfigParser
+from dataclasses import dataclass, fields
+import logging
+from typing import Any, Callable
+
+
+""" Config file re-read on every SIGHUP. """
+CONFIG_FILEPATH = "config.ini"
+
+
+@dataclass(frozen=True)
+class Tuning:
+    """
+    Immutable snapshot of the server performance knobs that can be
+    reloaded at runtime without restarting the server
+    """
+    logging_level: str
+    recv_buffer_size: int
+    queue_max_size: int
+    flush_interval: float
+    max_connections: int
+
+    def changes(self, new: "Tuning") -> dict[str, tuple[Any, Any]]:
+        """
+        Return every field as a (old, new) tuple
+        """
+        return {
+            field.name: (getattr(self, field.name), getattr(new, field.name))
+            for field in fields(self)
+        }
+
+    def check_clients_amount(self, clients_amount: int) -> None:
+        """
+        Raise a ValueError if max_connections can not serve every agency
+
+        Each client keeps its connection open until the end of the draw,
+        so a limit lower than the amount of clients would never let the
+        draw happen
+        """
+        if self.max_connections and self.max_connections < clients_amount:
+            raise ValueError(
+                f"MAX_CONNECTIONS ({self.max_connections}) must be 0 or at least "
+                f"CLIENTS_AMOUNT ({clients_amount})")
+
+
+def parse_tuning(lookup: Callable[[str], str]) -> Tuning:
+    """
+    Build a Tuning from a key lookup function
+
+    lookup receives the config key name (e.g. RECV_BUFFER_SIZE) and must
+    return its raw string value. A KeyError is thrown if a key is missing
+    and a ValueError if a value could not be parsed or is out of range
+    """
+    logging_level: str = lookup("LOGGING_LEVEL").upper()
+    if not isinstance(logging.getLevelName(logging_level), int):
+        raise ValueError(f"invalid LOGGING_LEVEL: {logging_level}")
+
+    recv_buffer_size: int = int(lookup("RECV_BUFFER_SIZE"))
+    if recv_buffer_size <= 0:
+        raise ValueError("RECV_BUFFER_SIZE must be positive")
+
+    # 0 means unbounded, as in queue.Queue
+    queue_max_size: int = int(lookup("QUEUE_MAX_SIZE"))
+    if queue_max_size < 0:
+        raise ValueError("QUEUE_MAX_SIZE must not be negative")
+
+    # 0 means every batch is written to disk as soon as it is received
+    flush_interval: float = float(lookup("FLUSH_INTERVAL"))
+    if flush_interval < 0:
+        raise ValueError("FLUSH_INTERVAL must not be negative")
+
+    # 0 means no limit
+    max_connections: int = int(lookup("MAX_CONNECTIONS"))
+    if max_connections < 0:
+        raise ValueError("MAX_CONNECTIONS must not be negative")
+
+    return Tuning(
+        logging_level=logging_level,
+        recv_buffer_size=recv_buffer_size,
+        queue_max_size=queue_max_size,
+        flush_interval=flush_interval,
+        max_connections=max_connections,
+    )
+
+
+def load_tuning(path: str = CONFIG_FILEPATH) -> Tuning:
+    """
+    Read the tuning parameters from the config file only
+
+    Used on reload, where the config file is the single source of truth
+    since the environment of a running process can not be changed
+    """
+    config = ConfigParser()
+    if not config.read(path):
+        raise FileNotFoundError(f"config file not found: {path}")
+
+    return parse_tuning(lambda key: config["DEFAULT"][key])
@@ -1,5 +1,6 @@
 import csv
 import datetime
+import io
 import time
 
 
@@ -33,11 +34,27 @@ Persist the information of each bet in the STORAGE_FILEPATH file.
 Not thread-safe/process-safe.
 """
 def store_bets(bets: list[Bet]) -> None:
+    store_csv(bets_to_csv(bets))
+
+""" Storage row of a bet, as written in the STORAGE_FILEPATH file. """
+def bet_to_row(bet: Bet) -> list[str]:
+    return [str(bet.agency), bet.first_name, bet.last_name,
+            bet.document, bet.birthdate.isoformat(), str(bet.number)]
+
+""" CSV text of a batch of bets, as written in the STORAGE_FILEPATH file. """
+def bets_to_csv(bets: list[Bet]) -> str:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, quoting=csv.QUOTE_MINIMAL)
+    writer.writerows(bet_to_row(bet) for bet in bets)
+    return buffer.getvalue()
+
+"""
+Append already serialized CSV text to the STORAGE_FILEPATH file.
+Not thread-safe/process-safe.
+"""
+def store_csv(text: str) -> None:
     with open(STORAGE_FILEPATH, 'a+') as file:
-        writer = csv.writer(file, quoting=csv.QUOTE_MINIMAL)
-        for bet in bets:
-            writer.writerow([bet.agency, bet.first_name, bet.last_name,
-                             bet.document, bet.birthdate, bet.number])
+        file.write(text)
 
 """
 Loads the information all the bets in the STORAGE_FILEPATH file.
@@ -1,5 +1,5 @@
 from enum import Enum
-from common.utils import Bet
+from common.utils import Bet, bets_to_csv
 
 
 class PacketHeader(Enum):
@@ -22,6 +22,10 @@ class BetDeserializationError(ValueError):
         self.bets_len = len
         super().__init__("Invalid message format, expected 6 fields")
 
+    def __reduce__(self):
+        # Keep bets_len when the error is sent back from a decode worker process
+        return (BetDeserializationError, (self.bets_len,))
+
 
 def __deserialize(data: str) -> Bet:
     """
@@ -42,16 +46,17 @@ def __deserialize(data: str) -> Bet:
     return Bet(agency, first_name, last_name, document, birthday, number)
 
 
-def deserialize_header(data: bytes) -> tuple[str, str]:
+def split_header(data: bytes) -> tuple[str, bytes]:
     """
-    Deserialize the header of a message from a byte string.
+    Deserialize the header of a message from a byte string, keeping the
+    message value as raw bytes.
     """
-    split: list[str] = data.decode("utf-8").split(" ", maxsplit=1)
+    split: list[bytes] = data.split(b" ", maxsplit=1)
 
     if len(split) != 2:
         raise ValueError("Invalid message format, expected message value")
 
-    return split[0], split[1]
+    return split[0].decode("utf-8"), split[1]
 
 
 def deserialize_bets(data: str) -> list[Bet]:
@@ -64,3 +69,12 @@ def deserialize_bets(data: str) -> list[Bet]:
         return [__deserialize(i) for i in bets_raw]
     except ValueError as e:
         raise BetDeserializationError(len(bets_raw)) from e
+
+
+def deserialize_bets_csv(data: bytes) -> tuple[int, str]:
+    """
+    Deserialize and validate a list of bets from a raw byte string into
+    the amount of bets and their CSV text, ready to be stored.
+    """
+    bets: list[Bet] = deserialize_bets(data.decode("utf-8"))
+    return len(bets), bets_to_csv(bets)
@@ -9,10 +9,13 @@ class Socket:
     """
     _socket: socket.socket
     address: tuple[str, int]
+    recv_buffer_size: int
     _recv_buffer: bytes = b''
 
-    def __init__(self, address: tuple[str, int], skt: Optional[socket.socket] = None, listen_backlog: int = 5) -> None:
+    def __init__(self, address: tuple[str, int], skt: Optional[socket.socket] = None, listen_backlog: int = 5,
+                 recv_buffer_size: int = 1024) -> None:
         self.address = address
+        self.recv_buffer_size = recv_buffer_size
 
         if skt:  # Client socket
             self._socket = skt
@@ -26,6 +29,7 @@ class Socket:
     def accept(self) -> "Socket":
         """
         Accept a new client connection and return a new Socket object
+        that inherits the receive buffer size of the listening socket
         """
         c, addr = self._socket.accept()
 
@@ -33,7 +37,7 @@ class Socket:
             f'action: accept_connections | result: success | ip: {addr[0]}'
         )
 
-        return Socket(address=addr, skt=c)
+        return Socket(address=addr, skt=c, recv_buffer_size=self.recv_buffer_size)
 
     def close(self) -> None:
         """
@@ -66,7 +70,7 @@ class Socket:
                     split_buff) > 1 else b''
                 continue
 
-            chunk = self._socket.recv(1024)
+            chunk = self._socket.recv(self.recv_buffer_size)
             if not chunk:
                 raise BrokenPipeError("Connection closed by peer")
             self._recv_buffer += chunk
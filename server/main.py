@@ -1,7 +1,9 @@
 #!/usr/bin/env python3
 
 from configparser import ConfigParser
+from common.draw_rules import DrawRules, parse_draw_rules
 from common.server import Server
+from common.tuning import Tuning, parse_tuning
 import logging
 import os
 
@@ -27,8 +29,13 @@ def initialize_config():
             os.getenv('SERVER_PORT', config["DEFAULT"]["SERVER_PORT"]))
         config_params["listen_backlog"] = int(
             os.getenv('SERVER_LISTEN_BACKLOG', config["DEFAULT"]["SERVER_LISTEN_BACKLOG"]))
-        config_params["logging_level"] = os.getenv(
-            'LOGGING_LEVEL', config["DEFAULT"]["LOGGING_LEVEL"])
+        config_params["decode_workers"] = int(
+            os.getenv('DECODE_WORKERS', config["DEFAULT"]["DECODE_WORKERS"]))
+        if config_params["decode_workers"] < 0:
+            raise ValueError("DECODE_WORKERS must not be negative")
+        config_params["tuning"] = parse_tuning(
+            lambda key: os.getenv(key, config["DEFAULT"][key]))
+        config_params["draw_rules"] = parse_draw_rules(config)
     except KeyError as e:
         raise KeyError(
             "Key was not found. Error: {} .Aborting server".format(e))
@@ -41,21 +48,27 @@ def initialize_config():
 
 def main():
     config_params = initialize_config()
-    logging_level = config_params["logging_level"]
+    tuning: Tuning = config_params["tuning"]
+    draw_rules: DrawRules = config_params["draw_rules"]
     port = config_params["port"]
     listen_backlog = config_params["listen_backlog"]
+    decode_workers = config_params["decode_workers"]
 
-    initialize_log(logging_level)
+    initialize_log(tuning.logging_level)
 
     # Log config parameters at the beginning of the program to verify the configuration
     # of the component
     logging.debug(f"action: config | result: success | port: {port} | "
-                  f"listen_backlog: {listen_backlog} | logging_level: {logging_level}")
+                  f"listen_backlog: {listen_backlog} | decode_workers: {decode_workers} | logging_level: {tuning.logging_level} | "
+                  f"recv_buffer_size: {tuning.recv_buffer_size} | queue_max_size: {tuning.queue_max_size} | "
+                  f"flush_interval: {tuning.flush_interval} | max_connections: {tuning.max_connections} | "
+                  f"draw_tiers: {', '.join(draw_rules.tiers)}")
 
     clients_amount: int = int(os.getenv('CLIENTS_AMOUNT', 1))
+    tuning.check_clients_amount(clients_amount)
 
     # Initialize server and start server loop
-    server = Server(port, listen_backlog, clients_amount)
+    server = Server(port, listen_backlog, clients_amount, tuning, draw_rules, decode_workers)
     server.run()
 
 
@@ -1,8 +1,27 @@
 from common.utils import *
+from common.bet_decoder import BetDecoder
+from common.bet_monitor import Action, BetMonitor
+from common.draw_rules import parse_draw_rules, parse_numbers
+from common.tuning import load_tuning, parse_tuning
+from comms.packet import BetDeserializationError
+from configparser import ConfigParser
+import multiprocessing
 import os
+import tempfile
+import time
 import unittest
 
-class TestUtils(unittest.TestCase):
+class BetTestCase(unittest.TestCase):
+
+    def _assert_equal_bets(self, b1, b2):
+        self.assertEqual(b1.agency, b2.agency)
+        self.assertEqual(b1.first_name, b2.first_name)
+        self.assertEqual(b1.last_name, b2.last_name)
+        self.assertEqual(b1.document, b2.document)
+        self.assertEqual(b1.birthdate, b2.birthdate)
+        self.assertEqual(b1.number, b2.number)
+
+class TestUtils(BetTestCase):
 
     def tearDown(self):
         if os.path.exists(STORAGE_FILEPATH):
@@ -46,13 +65,178 @@ class TestUtils(unittest.TestCase):
         self._assert_equal_bets(to_store[0], from_load[0])
         self._assert_equal_bets(to_store[1], from_load[1])
 
-    def _assert_equal_bets(self, b1, b2):
-        self.assertEqual(b1.agency, b2.agency)
-        self.assertEqual(b1.first_name, b2.first_name)
-        self.assertEqual(b1.last_name, b2.last_name)
-        self.assertEqual(b1.document, b2.document)
-        self.assertEqual(b1.birthdate, b2.birthdate)
-        self.assertEqual(b1.number, b2.number)
+class TestTuning(unittest.TestCase):
+
+    RAW = {
+        'LOGGING_LEVEL': 'debug',
+        'RECV_BUFFER_SIZE': '4096',
+        'QUEUE_MAX_SIZE': '10',
+        'FLUSH_INTERVAL': '0.5',
+        'MAX_CONNECTIONS': '20',
+    }
+
+    def test_parse_tuning_must_parse_fields(self):
+        t = parse_tuning(lambda key: self.RAW[key])
+        self.assertEqual('DEBUG', t.logging_level)
+        self.assertEqual(4096, t.recv_buffer_size)
+        self.assertEqual(10, t.queue_max_size)
+        self.assertEqual(0.5, t.flush_interval)
+        self.assertEqual(20, t.max_connections)
+
+    def test_parse_tuning_with_invalid_value_must_fail(self):
+        for key, value in [('LOGGING_LEVEL', 'LOUD'), ('RECV_BUFFER_SIZE', '0'), ('QUEUE_MAX_SIZE', '-1')]:
+            raw = dict(self.RAW, **{key: value})
+            with self.assertRaises(ValueError):
+                parse_tuning(lambda k: raw[k])
+
+    def test_parse_tuning_with_missing_key_must_fail(self):
+        raw = dict(self.RAW)
+        del raw['MAX_CONNECTIONS']
+        with self.assertRaises(KeyError):
+            parse_tuning(lambda k: raw[k])
+
+    def test_load_tuning_must_read_config_file(self):
+        with tempfile.NamedTemporaryFile('w', suffix='.ini', delete=False) as f:
+            f.write('[DEFAULT]\n' + ''.join(f'{k} = {v}\n' for k, v in self.RAW.items()))
+        try:
+            self.assertEqual(parse_tuning(lambda key: self.RAW[key]), load_tuning(f.name))
+        finally:
+            os.remove(f.name)
+
+    def test_changes_must_include_old_and_new_values(self):
+        old = parse_tuning(lambda key: self.RAW[key])
+        new = parse_tuning(lambda key: dict(self.RAW, RECV_BUFFER_SIZE='8192')[key])
+        self.assertEqual((4096, 8192), old.changes(new)['recv_buffer_size'])
+        self.assertEqual((10, 10), old.changes(new)['queue_max_size'])
+
+
+    def test_max_connections_lower_than_clients_amount_must_fail(self):
+        t = parse_tuning(lambda key: self.RAW[key])
+        t.check_clients_amount(20)
+        parse_tuning(lambda key: dict(self.RAW, MAX_CONNECTIONS='0')[key]).check_clients_amount(100)
+        with self.assertRaises(ValueError):
+            t.check_clients_amount(21)
+
+
+class TestBetMonitor(unittest.TestCase):
+
+    def tearDown(self):
+        if os.path.exists(STORAGE_FILEPATH):
+            os.remove(STORAGE_FILEPATH)
+
+    def test_buffered_bets_must_be_stored_on_shutdown(self):
+        monitor = BetMonitor(1, parse_draw_rules(ConfigParser()), queue_max_size=1, flush_interval=3600)
+        monitor.push_action((Action.STORE_CSV, '1,first,last,10000000,2000-12-20,7500\r\n'))
+        monitor.push_action((Action.STORE_CSV, '2,first,last,10000001,2000-12-21,7501\r\n'))
+        monitor.shutdown()
+
+        self.assertEqual([1, 2], [b.agency for b in load_bets()])
+
+    def test_reconfigure_must_flush_buffered_bets_with_new_interval(self):
+        monitor = BetMonitor(1, parse_draw_rules(ConfigParser()), flush_interval=3600)
+        try:
+            monitor.push_action((Action.STORE_CSV, '1,first,last,10000000,2000-12-20,7500\r\n'))
+            # Let the worker buffer the bets and block waiting on the old interval
+            time.sleep(0.1)
+            monitor.reconfigure(queue_max_size=0, flush_interval=0)
+
+            # The file is created before the rows are written, wait for the rows
+            stored = []
+            deadline = time.monotonic() + 2
+            while not stored and time.monotonic() < deadline:
+                time.sleep(0.01)
+                if os.path.exists(STORAGE_FILEPATH):
+                    stored = [b.agency for b in load_bets()]
+
+            self.assertEqual([1], stored)
+        finally:
+            monitor.shutdown()
+
+class TestDrawRules(unittest.TestCase):
+
+    def _bet(self, agency, number):
+        return Bet(str(agency), 'first', 'last', '10000000', '2000-12-20', number)
+
+    def test_parse_numbers_must_expand_ranges(self):
+        self.assertEqual({1, 5, 6, 7}, parse_numbers('1, 5-7'))
+
+    def test_parse_numbers_with_invalid_range_must_fail(self):
+        for raw in ['7-5', '10000', '-1', 'x']:
+            with self.assertRaises(ValueError):
+                parse_numbers(raw)
+
+    def test_default_rules_must_match_has_won(self):
+        rules = parse_draw_rules(ConfigParser())
+        bets = [self._bet(1, n) for n in range(LOTTERY_WINNER_NUMBER - 2, LOTTERY_WINNER_NUMBER + 3)]
+        winners = rules.draw(bets)
+        self.assertEqual([b for b in bets if has_won(b)], winners['winner'])
+
+    def test_duplicate_or_empty_tier_names_must_fail(self):
+        for raw in ['[DRAW a]\nNUMBERS = 1\n[DRAW  a]\nNUMBERS = 2\n', '[DRAW  ]\nNUMBERS = 1\n']:
+            config = ConfigParser()
+            config.read_string(raw)
+            with self.assertRaises(ValueError):
+                parse_draw_rules(config)
+
+    def test_draw_must_report_winners_by_tier(self):
+        config = ConfigParser()
+        config.read_string(
+            '[DRAW first]\nNUMBERS = 7574\n'
+            '[DRAW second]\nNUMBERS = 7570-7579\nAGENCY_2 = 100\n'
+        )
+        rules = parse_draw_rules(config)
+        bets = [self._bet(1, 7574), self._bet(1, 7575), self._bet(2, 7575),
+                self._bet(2, 100), self._bet(1, 100), self._bet(2, 7574), self._bet(1, 10000)]
+        winners = rules.draw(bets)
+
+        self.assertEqual(('first', 'second'), rules.tiers)
+        self.assertEqual([bets[0], bets[5]], winners['first'])
+        self.assertEqual([bets[1], bets[3]], winners['second'])
+
+class TestBetDecoder(BetTestCase):
+
+    PAYLOAD = b'1 first last 10000000 2000-12-20 7500&2 Juan-Cruz last 10000001 2000-12-21 0042'
+
+    def tearDown(self):
+        if os.path.exists(STORAGE_FILEPATH):
+            os.remove(STORAGE_FILEPATH)
+
+    def test_decoded_csv_must_match_stored_bets(self):
+        bets_len, bets_csv = BetDecoder(0).decode(self.PAYLOAD)
+        store_csv(bets_csv)
+        from_load = list(load_bets())
+
+        self.assertEqual(2, bets_len)
+        self.assertEqual(2, len(from_load))
+        self._assert_equal_bets(Bet('1', 'first', 'last', '10000000', '2000-12-20', 7500), from_load[0])
+        self._assert_equal_bets(Bet('2', 'Juan Cruz', 'last', '10000001', '2000-12-21', 42), from_load[1])
+
+    def test_worker_processes_must_decode_like_calling_thread(self):
+        decoder = BetDecoder(2)
+        try:
+            self.assertEqual(BetDecoder(0).decode(self.PAYLOAD), decoder.decode(self.PAYLOAD))
+
+            with self.assertRaises(BetDeserializationError) as ctx:
+                decoder.decode(self.PAYLOAD + b'&3 first last 10000002 not-a-date 1')
+            self.assertEqual(3, ctx.exception.bets_len)
+        finally:
+            decoder.shutdown()
+
+    def test_decode_must_recover_from_dead_worker(self):
+        decoder = BetDecoder(1)
+        try:
+            expected = decoder.decode(self.PAYLOAD)
+
+            for worker in multiprocessing.active_children():
+                worker.kill()
+                worker.join()
+
+            self.assertEqual(expected, decoder.decode(self.PAYLOAD))
+            # Following payloads go through the rebuilt pool
+            self.assertEqual(expected, decoder.decode(self.PAYLOAD))
+            self.assertEqual(1, len(multiprocessing.active_children()))
+        finally:
+            decoder.shutdown()
 
 if __name__ == '__main__':
     unittest.main()